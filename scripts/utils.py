@@ -1,39 +1,143 @@
 """Functions for scraping details out of an ontology"""
 
 import datetime
+import functools
 import subprocess
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from pathlib import Path
-from urllib.parse import urlparse
+from types import MappingProxyType
 
 from rdflib import BNode, Graph, Literal, Namespace, URIRef
-from rdflib.collection import Collection
 from rdflib.namespace import OWL, RDF, RDFS, SDO, SH, XSD
-
-
-def git_short_hash() -> str:
-    output = subprocess.check_output("git rev-parse --short HEAD".split())
-    short_hash = output.decode().strip()
-    return short_hash
-
-
-@dataclass(frozen=True)
+from rdflib.term import Node
+
+
+@functools.lru_cache(maxsize=1)
+def git_short_hash(repo: Path = Path(__file__).parent.parent) -> str:
+    """Get the first 7 characters of the commit hash checked out in repo
+
+    repo defaults to the repository this script lives in, not the current
+    working directory. Unlike `git rev-parse --short`, the hash is always cut
+    to 7 characters, regardless of core.abbrev or whether a longer prefix is
+    needed to be unambiguous.
+    """
+    # read the hash straight out of .git to avoid forking a git process,
+    # falling back to git itself for anything unusual (worktrees etc.)
+    git_dir = repo / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if head.startswith("ref: "):
+            ref = head.removeprefix("ref: ")
+            ref_file = git_dir / ref
+            if ref_file.exists():
+                head = ref_file.read_text().strip()
+            else:
+                for line in (git_dir / "packed-refs").read_text().splitlines():
+                    if line.endswith(f" {ref}"):
+                        head = line.split()[0]
+                        break
+                else:
+                    raise ValueError(f"could not resolve {ref}")
+        return head[:7]
+    except (OSError, ValueError):
+        output = subprocess.check_output("git rev-parse HEAD".split(), cwd=repo)
+        short_hash = output.decode().strip()[:7]
+        return short_hash
+
+
+@dataclass(frozen=True, slots=True)
 class Restriction:
-    on_klass: tuple[URIRef]
-    on_property: [URIRef]
+    on_klass: tuple[URIRef, ...]
+    on_property: URIRef
     min_cardinality: Literal | None = None
     max_cardinality: Literal | None = None
 
 
 class Ontology:
     def __init__(self, src: Path, uri: URIRef):
-        self.graph = Graph().parse(src)
-        self.graph.bind(":", str(uri))
+        # the ontology is only parsed and indexed once, so there is no need for
+        # the context-aware indices of the default Memory store
+        self.graph = Graph(store="SimpleMemory").parse(src)
+        self.graph.bind("", str(uri))
         self.identifier = uri
+        self._id_str = str(uri)
+        self._properties_cache: dict[tuple[URIRef, URIRef], frozenset[URIRef]] = {}
+
+        # index the graph once up front so lookups don't rescan the store. The
+        # indices are a snapshot of the graph as loaded, so later changes to
+        # self.graph are not seen by classes(), properties() or restrictions().
+        self._index_triples()
+        self._lists = self._resolve_union_lists()
+        self._domain_property_ranges = self._build_domain_property_ranges()
+
+    def _index_triples(self):
+        """Index every triple in the graph by predicate and by subject"""
+        # _by_pred_obj maps predicate -> object -> subjects, _by_pred_subj maps
+        # predicate -> subject -> objects and _spo maps subject -> (predicate,
+        # object) pairs. Only _defined_terms drops BNodes and foreign terms.
+        self._by_pred_obj: dict[URIRef, dict[Node, set[Node]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        self._by_pred_subj: dict[URIRef, dict[Node, set[Node]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        self._spo: dict[Node, list[tuple[URIRef, Node]]] = defaultdict(list)
+        for s, p, o in self.graph:
+            self._by_pred_obj[p][o].add(s)
+            self._by_pred_subj[p][s].add(o)
+            self._spo[s].append((p, o))
+        self._by_type = self._by_pred_obj[RDF.type]
+        self._defined_terms: set[URIRef] = {
+            s for s in self._spo if isinstance(s, URIRef) and s.startswith(self._id_str)
+        }
+        self._defined_classes: frozenset[URIRef] = frozenset(
+            self._defined_terms.intersection(self._by_type.get(OWL.Class, ()))
+        )
+
+    def _resolve_union_lists(self) -> dict[Node, tuple[Node, ...]]:
+        """Map the head of each owl:unionOf list to its members"""
+        lists = {}
+        firsts = self._by_pred_subj[RDF.first]
+        rests = self._by_pred_subj[RDF.rest]
+        for heads in self._by_pred_subj[OWL.unionOf].values():
+            for head in heads:
+                members = []
+                seen = set()
+                node = head
+                while node in firsts:
+                    if node in seen:
+                        raise ValueError(f"rdf:List starting at {head} is cyclic")
+                    seen.add(node)
+                    members.append(next(iter(firsts[node])))
+                    node = next(iter(rests.get(node, {RDF.nil})))
+                lists[head] = tuple(members)
+        return lists
+
+    def _build_domain_property_ranges(
+        self,
+    ) -> Mapping[URIRef, Mapping[URIRef, frozenset[URIRef]]]:
+        """Map each owl:Class to its properties and their rdfs:range classes"""
+        domain_property_ranges: dict[URIRef, dict[URIRef, frozenset[URIRef]]] = {}
+        ranges = self._by_pred_subj[RDFS.range]
+        for domain, props in self._by_pred_obj[RDFS.domain].items():
+            if domain not in self._defined_classes:
+                continue
+            for prop in self._defined_terms.intersection(props):
+                domain_property_ranges.setdefault(domain, {})[prop] = frozenset(
+                    self._defined_classes.intersection(ranges.get(prop, ()))
+                )
+        return MappingProxyType(
+            {
+                domain: MappingProxyType(prop_ranges)
+                for domain, prop_ranges in domain_property_ranges.items()
+            }
+        )
 
     def classes(
         self, in_domain_of: URIRef | None = None, in_range_of: URIRef | None = None
-    ) -> set[URIRef]:
+    ) -> frozenset[URIRef]:
         """Get all owl:Class's defined in the ontology
 
         optionally restricted to those that are in the range or domain of
@@ -43,29 +147,29 @@ class Ontology:
             [in_domain_of, in_range_of]
         ), "domain and range cannot be given at the same time"
 
-        all_klasses = {
-            klass
-            for klass in self.graph.subjects(RDF.type, OWL.Class)
-            if not isinstance(klass, BNode)
-            and str(klass).startswith(str(self.identifier))
-        }
         if in_domain_of:
-            return {
-                klass
-                for klass in self.graph.objects(in_domain_of, RDFS.range)
-                if klass in all_klasses
-            }
+            return self._defined_classes.intersection(
+                self._by_pred_subj[RDFS.range].get(in_domain_of, ())
+            )
         if in_range_of:
-            return {
-                klass
-                for klass in self.graph.objects(in_range_of, RDFS.range)
-                if klass in all_klasses
-            }
-        return all_klasses
+            return self._defined_classes.intersection(
+                self._by_pred_subj[RDFS.range].get(in_range_of, ())
+            )
+        return self._defined_classes
+
+    def domain_property_ranges(
+        self,
+    ) -> Mapping[URIRef, Mapping[URIRef, frozenset[URIRef]]]:
+        """Get the owl:ObjectProperty's for each owl:Class in their rdfs:domain
+
+        mapped to the owl:Class's in the rdfs:range of each property. The
+        mapping is read only.
+        """
+        return self._domain_property_ranges
 
     def properties(
         self, with_domain: URIRef | None = None, with_range: URIRef | None = None
-    ) -> list[URIRef]:
+    ) -> frozenset[URIRef]:
         """Get all owl:ObjectProperty's defined in the ontology
         optionally restricted to those with the given rdfs:domain or rdfs:range
         """
@@ -80,15 +184,16 @@ class Ontology:
             (RDFS.domain, with_domain) if with_domain else (RDFS.range, with_range)
         )
         assert (
-            obj in self.classes()
+            obj in self._defined_classes
         ), f"{object} is not an owl:Class defined in this ontology"
 
-        return {
-            prop
-            for prop in self.graph.subjects(pred, obj)
-            if not isinstance(prop, BNode)
-            and str(prop).startswith(str(self.identifier))
-        }
+        props = self._properties_cache.get((pred, obj))
+        if props is None:
+            props = frozenset(
+                self._defined_terms.intersection(self._by_pred_obj[pred].get(obj, ()))
+            )
+            self._properties_cache[(pred, obj)] = props
+        return props
 
     def restrictions(self, for_klass: URIRef) -> set[Restriction]:
         """Get all owl:Restrictions as Restriction objects
@@ -97,29 +202,22 @@ class Ontology:
         """
 
         restrictions = []
-        restriction_uris = {
-            uri for uri in self.graph.subjects(RDF.type, OWL.Restriction)
-        }
+        restriction_uris = self._by_type.get(OWL.Restriction, set())
         if for_klass:
-            subklass_uris = {
-                uri for uri in self.graph.objects(for_klass, RDFS.subClassOf)
-            }
+            subklass_uris = self._by_pred_subj[RDFS.subClassOf].get(for_klass, set())
             restriction_uris = restriction_uris.intersection(subklass_uris)
         for restriction_uri in restriction_uris:
-            on_klass = self.graph.value(restriction_uri, OWL.onClass, None)
+            po = dict(self._spo.get(restriction_uri, ()))
+            on_klass = po.get(OWL.onClass)
             if isinstance(on_klass, BNode):
-                union_bnode = self.graph.value(on_klass, OWL.unionOf, None)
-                on_klass = tuple(Collection(self.graph, union_bnode))
+                union_bnode = dict(self._spo.get(on_klass, ())).get(OWL.unionOf)
+                on_klass = self._lists.get(union_bnode, ())
             else:
                 on_klass = (on_klass,)
-            on_property = self.graph.value(restriction_uri, OWL.onProperty, None)
-            min_cardinality = self.graph.value(
-                restriction_uri, OWL.minQualifiedCardinality, None, default=None
-            )
+            on_property = po.get(OWL.onProperty)
+            min_cardinality = po.get(OWL.minQualifiedCardinality)
             # TODO: handle unqualified min_cardinality
-            max_cardinality = self.graph.value(
-                restriction_uri, OWL.maxQualifiedCardinality, None, default=None
-            )
+            max_cardinality = po.get(OWL.maxQualifiedCardinality)
             # TODO: handle unqualified max_cardinality
             restriction = Restriction(
                 on_klass=on_klass,
@@ -151,100 +249,144 @@ class Shacl:
         self.graph.bind("", self.identifier)
         if base_ontology_prefix:
             self.graph.bind(base_ontology_prefix, self.ont.identifier)
+        # all prefixes are bound by now, so the namespace manager is stable
+        ns_mgr = self.graph.namespace_manager
+        version_n3 = versionIRI.n3(namespace_manager=ns_mgr)
 
         # Validator Ontology metadata
         # --------------------------------------------------------------------------------
-        self.graph.add((self.identifier, RDF.type, OWL.Ontology))
-        self.graph.add((self.identifier, OWL.versionIRI, versionIRI))
-        self.graph.add(
-            (
-                self.identifier,
-                OWL.versionInfo,
-                Literal(
-                    f"{versionIRI.n3(namespace_manager=self.graph.namespace_manager)}: Generated by OntoShacl on commit: {git_short_hash()}"
-                ),
-            )
+        version_info = (
+            f"{version_n3}: Generated by OntoShacl on commit: {git_short_hash()}"
         )
-        self.graph.add((self.identifier, SDO.creator, creator))
         dateModified = datetime.date.today().isoformat()
         dateCreated = dateCreated or dateModified
-        self.graph.add(
-            (self.identifier, SDO.dateCreated, Literal(dateCreated, datatype=XSD.date))
+        description = (
+            description or f"OntoShacl generated validator for {self.ont.identifier}"
         )
-        self.graph.add(
+        name = name or f"{self.ont.identifier} Validator"
+        meta = [
+            (self.identifier, RDF.type, OWL.Ontology, self.graph),
+            (self.identifier, OWL.versionIRI, versionIRI, self.graph),
+            (self.identifier, OWL.versionInfo, Literal(version_info), self.graph),
+            (self.identifier, SDO.creator, creator, self.graph),
+            (
+                self.identifier,
+                SDO.dateCreated,
+                Literal(dateCreated, datatype=XSD.date),
+                self.graph,
+            ),
             (
                 self.identifier,
                 SDO.dateModified,
                 Literal(dateModified, datatype=XSD.date),
-            )
-        )
-        description = (
-            description or f"OntoShacl generated validator for {self.ont.identifier}"
-        )
-        self.graph.add((self.identifier, SDO.description, Literal(description)))
-        name = name or f"{self.ont.identifier} Validator"
-        self.graph.add((self.identifier, SDO.name, Literal(name)))
+                self.graph,
+            ),
+            (self.identifier, SDO.description, Literal(description), self.graph),
+            (self.identifier, SDO.name, Literal(name), self.graph),
+        ]
         if publisher:
-            self.graph.add((self.identifier, SDO.publisher, publisher))
+            meta.append((self.identifier, SDO.publisher, publisher, self.graph))
+        self.graph.addN(meta)
         # --------------------------------------------------------------------------------
 
-        for klass in self.ont.classes():
-            self.add_nodeshape(klass)
+        # each node shape only depends on the (read only) ontology, so they are
+        # built independently and added to the graph in one batch
+        self.graph.addN(
+            quad
+            for klass in self.ont.classes()
+            for quad in self._nodeshape_quads(klass)
+        )
 
     def add_nodeshape(self, klass: URIRef):
+        self.graph.addN(self._nodeshape_quads(klass))
+
+    def _nodeshape_quads(self, klass: URIRef) -> list[tuple]:
+        """Build the quads for the sh:NodeShape of an owl:Class
+
+        Nothing is added to the graph here.
+        """
         shape_uri = self.compute_shape_uri(klass)
-        self.graph.add((shape_uri, RDF.type, SH.NodeShape))
-        self.graph.add((shape_uri, RDFS.isDefinedBy, self.ont.identifier))
-        self.graph.add((shape_uri, SH.targetClass, klass))
+        quads = [
+            (shape_uri, RDF.type, SH.NodeShape, self.graph),
+            (shape_uri, RDFS.isDefinedBy, self.ont.identifier, self.graph),
+            (shape_uri, SH.targetClass, klass, self.graph),
+        ]
 
         # TODO: better combining of sh:properties
         # should only really be one loop here instead of one for properties
         # and one for restrictions.
         prop_path_map = dict()
-        for prop in self.ont.properties(with_domain=klass):
-            prop_klasses = self.ont.classes(in_range_of=prop)
+        prop_ranges = self.ont.domain_property_ranges().get(klass, {})
+        for prop, prop_klasses in prop_ranges.items():
             if len(prop_klasses) < 1:
                 continue
             prop_bnode = BNode()
             prop_path_map[prop] = prop_bnode
-            self.graph.add((shape_uri, SH.property, prop_bnode))
-            self.graph.add((prop_bnode, SH.path, prop))
+            quads.append((shape_uri, SH.property, prop_bnode, self.graph))
+            quads.append((prop_bnode, SH.path, prop, self.graph))
             if len(prop_klasses) > 1:
-                collection = Collection(self.graph, BNode())
-                for prop_klass in prop_klasses:
-                    k = BNode()
-                    self.graph.add((k, SH["class"], prop_klass))
-                    collection.append(k)
-                self.graph.add((prop_bnode, SH["or"], collection.uri))
+                head = self._add_or_list(prop_klasses, quads)
+                quads.append((prop_bnode, SH["or"], head, self.graph))
             elif len(prop_klasses) == 1:
-                self.graph.add((prop_bnode, SH["class"], list(prop_klasses)[0]))
+                quads.append(
+                    (prop_bnode, SH["class"], next(iter(prop_klasses)), self.graph)
+                )
 
         for restriction in self.ont.restrictions(for_klass=klass):
             prop_bnode = prop_path_map.get(restriction.on_property, None)
             if prop_bnode is None:
                 prop_bnode = BNode()
-                self.graph.add((shape_uri, SH.property, prop_bnode))
-                self.graph.add((prop_bnode, SH.path, restriction.on_property))
+                quads.append((shape_uri, SH.property, prop_bnode, self.graph))
+                quads.append((prop_bnode, SH.path, restriction.on_property, self.graph))
             if len(restriction.on_klass) > 1:
-                collection = Collection(self.graph, BNode())
-                for restriction_klass in restriction.on_klass:
-                    k = BNode()
-                    self.graph.add((k, SH["class"], restriction_klass))
-                    collection.append(k)
-                self.graph.add((prop_bnode, SH["or"], collection.uri))
+                head = self._add_or_list(restriction.on_klass, quads)
+                quads.append((prop_bnode, SH["or"], head, self.graph))
             elif len(restriction.on_klass) == 1:
-                self.graph.add((prop_bnode, SH["class"], restriction.on_klass[0]))
+                quads.append(
+                    (prop_bnode, SH["class"], restriction.on_klass[0], self.graph)
+                )
             if restriction.min_cardinality:
-                self.graph.add((prop_bnode, SH.minCount, restriction.min_cardinality))
+                quads.append(
+                    (prop_bnode, SH.minCount, restriction.min_cardinality, self.graph)
+                )
             if restriction.max_cardinality:
-                self.graph.add((prop_bnode, SH.maxCount, restriction.max_cardinality))
+                quads.append(
+                    (prop_bnode, SH.maxCount, restriction.max_cardinality, self.graph)
+                )
 
         # TODO: add sh:message for each sh:property [ sh:path <...> ; sh:message "some message" ]
+        return quads
+
+    def _add_or_list(self, klasses: Iterable[URIRef], quads: list[tuple]) -> BNode:
+        """Append the quads for an sh:or list of sh:class constraints to quads
+
+        A fresh list is built on every call, so each one is only referenced
+        once and can be written inline as a turtle collection.
+        Returns the head of the list.
+        """
+        sh_class_bnodes = []
+        for klass in klasses:
+            k = BNode()
+            quads.append((k, SH["class"], klass, self.graph))
+            sh_class_bnodes.append(k)
+        return self._add_rdf_list(sh_class_bnodes, quads)
+
+    def _add_rdf_list(self, items: list[Node], quads: list[tuple]) -> BNode:
+        """Append the quads for an rdf:List of items to quads
+
+        Returns the head of the list.
+        """
+        nodes = [BNode() for _ in items]
+        rests = nodes[1:] + [RDF.nil]
+        for node, item, rest in zip(nodes, items, rests):
+            quads.append((node, RDF.first, item, self.graph))
+            quads.append((node, RDF.rest, rest, self.graph))
+        return nodes[0]
 
     def compute_shape_uri(self, klass: URIRef) -> URIRef:
-        parse_result = urlparse(str(klass))
-        fragment = parse_result.fragment
-        path_part = parse_result.path.split("/")[-1]
+        path, _, fragment = klass.partition("#")
+        path, _, _query = path.partition("?")
+        path_part = path.rpartition("/")[2]
         shape_name = f"{fragment}Shape" if fragment else f"{path_part}Shape"
         shape_uri = self.shape[shape_name]
         return shape_uri
@@ -16,26 +16,27 @@ TEST_DATA_DIR = Path(__file__).parent / "test_data"
 VALIDATOR_DIR = Path(__file__).parent.parent / "validator"
 
 
-def load_shacl_shapes():
-    """Load the SHACL shapes from the rico-shacl.ttl file."""
+@pytest.fixture(scope="session")
+def shacl_graph():
+    """Load the SHACL shapes from the rico-shacl.ttl file once per session."""
     shacl_graph = Graph()
     shacl_graph.parse(VALIDATOR_DIR / "rico-shacl.ttl", format="turtle")
     return shacl_graph
 
 
-def validate_data(data_file: Path, expected_conform: bool):
+def validate_data(data_file: Path, expected_conform: bool, shacl_graph: Graph):
     """Validate RICO data against SHACL shapes."""
-    shacl_graph = load_shacl_shapes()
-
     # Load the data to validate
     data_graph = Graph()
     data_graph.parse(str(data_file), format="turtle")
 
-    # Perform validation
+    # Perform validation. The data graph is throwaway, so let pyshacl run
+    # inference on it in place rather than cloning it first.
     conforms, results_graph, results_text = validate(
         data_graph,
         shacl_graph=shacl_graph,
         inference="rdfs",
+        inplace=True,
         abort_on_first=False,
         meta_shacl=False,
         advanced=True,
@@ -48,18 +49,21 @@ def validate_data(data_file: Path, expected_conform: bool):
 class TestInstantiationShape:
     """Test cases for Instantiation shape validation."""
 
-    def test_valid_instantiation(self):
+    def test_valid_instantiation(self, shacl_graph):
         """Test that a valid Instantiation passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_instantiation.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_instantiation.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid instantiation should conform: {results}"
 
-    def test_invalid_instantiation_non_literal_properties(self):
+    def test_invalid_instantiation_non_literal_properties(self, shacl_graph):
         """Test that Instantiation with non-literal properties fails validation."""
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_instantiation_non_literal.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid instantiation should not conform: {results}"
         assert "must be a literal" in results
@@ -68,18 +72,21 @@ class TestInstantiationShape:
 class TestRecordResourceShape:
     """Test cases for RecordResource shape validation."""
 
-    def test_valid_record_resource(self):
+    def test_valid_record_resource(self, shacl_graph):
         """Test that a valid RecordResource passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_record_resource.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_record_resource.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid record resource should conform: {results}"
 
-    def test_invalid_record_resource_wrong_type(self):
+    def test_invalid_record_resource_wrong_type(self, shacl_graph):
         """Test that RecordResource with wrong property types fails validation."""
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_record_resource_wrong_type.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid record resource should not conform: {results}"
         assert "must be of type" in results
@@ -88,18 +95,21 @@ class TestRecordResourceShape:
 class TestRecordSetShape:
     """Test cases for RecordSet shape validation."""
 
-    def test_valid_record_set(self):
+    def test_valid_record_set(self, shacl_graph):
         """Test that a valid RecordSet passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_record_set.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_record_set.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid record set should conform: {results}"
 
-    def test_invalid_record_set_wrong_content_type(self):
+    def test_invalid_record_set_wrong_content_type(self, shacl_graph):
         """Test that RecordSet with wrong content type fails validation."""
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_record_set_wrong_content_type.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid record set should not conform: {results}"
         assert "must be of type ContentType" in results
@@ -108,17 +118,21 @@ class TestRecordSetShape:
 class TestRecordShape:
     """Test cases for Record shape validation."""
 
-    def test_valid_record(self):
+    def test_valid_record(self, shacl_graph):
         """Test that a valid Record passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_record.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_record.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid record should conform: {results}"
 
-    def test_invalid_record_wrong_subject_type(self):
+    def test_invalid_record_wrong_subject_type(self, shacl_graph):
         """Test that Record with wrong subject type fails validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "invalid_record_wrong_subject.ttl", expected_conform=False
+            TEST_DATA_DIR / "invalid_record_wrong_subject.ttl",
+            expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid record should not conform: {results}"
         assert "must be of type Thing" in results
@@ -127,18 +141,21 @@ class TestRecordShape:
 class TestThingShape:
     """Test cases for Thing shape validation."""
 
-    def test_valid_thing(self):
+    def test_valid_thing(self, shacl_graph):
         """Test that a valid Thing passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_thing.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_thing.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid thing should conform: {results}"
 
-    def test_invalid_thing_non_literal_title(self):
+    def test_invalid_thing_non_literal_title(self, shacl_graph):
         """Test that Thing with non-literal title fails validation."""
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_thing_non_literal_title.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid thing should not conform: {results}"
         assert "title must be a literal" in results
@@ -147,14 +164,16 @@ class TestThingShape:
 class TestActivityShape:
     """Test cases for Activity shape validation."""
 
-    def test_valid_activity(self):
+    def test_valid_activity(self, shacl_graph):
         """Test that a valid Activity passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_activity.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_activity.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid activity should conform: {results}"
 
-    def test_invalid_activity_wrong_type(self):
+    def test_invalid_activity_wrong_type(self, shacl_graph):
         """Test that Activity with wrong property type fails validation."""
         # Create test data with wrong type for activity property
         test_data = """@prefix : <https://www.ica.org/standards/RiC/ontology#> .
@@ -172,6 +191,7 @@ class TestActivityShape:
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_activity_wrong_type.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid activity should not conform: {results}"
         assert "must be of type Thing" in results
@@ -180,14 +200,16 @@ class TestActivityShape:
 class TestPersonShape:
     """Test cases for Person shape validation."""
 
-    def test_valid_person(self):
+    def test_valid_person(self, shacl_graph):
         """Test that a valid Person passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_person.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_person.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid person should conform: {results}"
 
-    def test_invalid_person_wrong_type(self):
+    def test_invalid_person_wrong_type(self, shacl_graph):
         """Test that Person with wrong property type fails validation."""
         # Create test data with wrong type for person property
         test_data = """@prefix : <https://www.ica.org/standards/RiC/ontology#> .
@@ -205,6 +227,7 @@ class TestPersonShape:
         conforms, results = validate_data(
             TEST_DATA_DIR / "invalid_person_wrong_type.ttl",
             expected_conform=False,
+            shacl_graph=shacl_graph,
         )
         assert not conforms, f"Invalid person should not conform: {results}"
         assert "must be of type Agent" in results
@@ -213,10 +236,12 @@ class TestPersonShape:
 class TestCorporateBodyShape:
     """Test cases for CorporateBody shape validation."""
 
-    def test_valid_corporate_body(self):
+    def test_valid_corporate_body(self, shacl_graph):
         """Test that a valid CorporateBody passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_corporate_body.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_corporate_body.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid corporate body should conform: {results}"
 
@@ -224,10 +249,12 @@ class TestCorporateBodyShape:
 class TestEventShape:
     """Test cases for Event shape validation."""
 
-    def test_valid_event(self):
+    def test_valid_event(self, shacl_graph):
         """Test that a valid Event passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_event.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_event.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid event should conform: {results}"
 
@@ -235,10 +262,12 @@ class TestEventShape:
 class TestPlaceShape:
     """Test cases for Place shape validation."""
 
-    def test_valid_place(self):
+    def test_valid_place(self, shacl_graph):
         """Test that a valid Place passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_place.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_place.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid place should conform: {results}"
 
@@ -246,10 +275,12 @@ class TestPlaceShape:
 class TestRelationShape:
     """Test cases for Relation shape validation."""
 
-    def test_valid_relation(self):
+    def test_valid_relation(self, shacl_graph):
         """Test that a valid Relation passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_relation.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_relation.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid relation should conform: {results}"
 
@@ -257,10 +288,12 @@ class TestRelationShape:
 class TestIdentifierShape:
     """Test cases for Identifier shape validation."""
 
-    def test_valid_identifier(self):
+    def test_valid_identifier(self, shacl_graph):
         """Test that a valid Identifier passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_identifier.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_identifier.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid identifier should conform: {results}"
 
@@ -268,10 +301,12 @@ class TestIdentifierShape:
 class TestFamilyShape:
     """Test cases for Family shape validation."""
 
-    def test_valid_family(self):
+    def test_valid_family(self, shacl_graph):
         """Test that a valid Family passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_family.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_family.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid family should conform: {results}"
 
@@ -279,10 +314,12 @@ class TestFamilyShape:
 class TestMechanismShape:
     """Test cases for Mechanism shape validation."""
 
-    def test_valid_mechanism(self):
+    def test_valid_mechanism(self, shacl_graph):
         """Test that a valid Mechanism passes validation."""
         conforms, results = validate_data(
-            TEST_DATA_DIR / "valid_mechanism.ttl", expected_conform=True
+            TEST_DATA_DIR / "valid_mechanism.ttl",
+            expected_conform=True,
+            shacl_graph=shacl_graph,
         )
         assert conforms, f"Valid mechanism should conform: {results}"
 
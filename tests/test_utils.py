@@ -0,0 +1,75 @@
+"""
+Test suite for the ontology scraping helpers in scripts/utils.py.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from rdflib import URIRef
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import utils  # noqa: E402
+from utils import Ontology, git_short_hash  # noqa: E402
+
+
+def git(repo: Path, *args: str) -> str:
+    """Run a git command in repo and return its stripped output."""
+    output = subprocess.check_output(["git", *args], cwd=repo)
+    return output.decode().strip()
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A throwaway git repository with two commits on main."""
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.name", "test")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    for message in ("first", "second"):
+        git(tmp_path, "commit", "-q", "--allow-empty", "-m", message)
+    # make sure the hash is read from .git rather than the git fallback
+    monkeypatch.setattr(utils, "subprocess", None)
+    git_short_hash.cache_clear()
+    yield tmp_path
+    git_short_hash.cache_clear()
+
+
+class TestGitShortHash:
+    """Test cases for reading the commit hash without forking git."""
+
+    def test_loose_ref(self, repo):
+        """Test that a branch stored as a loose ref file is resolved."""
+        assert (repo / ".git/refs/heads/main").exists()
+        assert git_short_hash(repo) == git(repo, "rev-parse", "--short=7", "HEAD")
+
+    def test_packed_ref(self, repo):
+        """Test that a branch only stored in packed-refs is resolved."""
+        git(repo, "pack-refs", "--all")
+        assert not (repo / ".git/refs/heads/main").exists()
+        assert git_short_hash(repo) == git(repo, "rev-parse", "--short=7", "HEAD")
+
+    def test_detached_head(self, repo):
+        """Test that a detached HEAD holding the hash itself is resolved."""
+        git(repo, "checkout", "-q", "--detach", "HEAD~1")
+        assert git_short_hash(repo) == git(repo, "rev-parse", "--short=7", "HEAD")
+
+
+class TestOntologyUnionLists:
+    """Test cases for resolving owl:unionOf lists."""
+
+    def test_cyclic_union_list(self, tmp_path):
+        """Test that a cyclic owl:unionOf list raises instead of hanging."""
+        test_data = """@prefix : <http://example.com/ont#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+
+:A a owl:Class .
+_:u owl:unionOf _:a .
+_:a rdf:first :A ; rdf:rest _:b .
+_:b rdf:first :A ; rdf:rest _:a .
+"""
+        src = tmp_path / "cyclic.ttl"
+        src.write_text(test_data)
+        with pytest.raises(ValueError, match="cyclic"):
+            Ontology(src=src, uri=URIRef("http://example.com/ont#"))